@@ -1,22 +1,47 @@
 import os
+import sys
+import queue
+import atexit
+import stat
+import errno
 import time
 import shutil
+import ctypes
 import hashlib
+import importlib.util
 import logging
+import tempfile
+import threading
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from ctypes.util import find_library
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional, Callable, List, Set, TypeVar
-
-from nsft_system_utils.file import write_text_file_content, touch_file
+from typing import (TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set,
+                    Tuple, TypeVar)
+from weakref import WeakKeyDictionary
 
 try:
+    import fcntl
+except ImportError:
+    # Not available on all platforms (e.g.: windows). Only used on linux.
+    pass
+
+from nsft_system_utils.file import write_text_file_content
+
+# Type checkers resolve the actual `FixtureRequest` (as configured for
+# `_pytest.*`, if anything). At runtime, it is only an alias for `Any`.
+if TYPE_CHECKING:
     from _pytest.fixtures import FixtureRequest as _FixtureRequestT
-    _with_pytest = True
-except ModuleNotFoundError:
+else:
     _FixtureRequestT = Any
-    _with_pytest = False
+
+# Only check for pytest's availability. Importing it is costly and
+# unnecessary for non test processes. Fixture requests are only ever used
+# through duck typing anyway.
+_with_pytest = importlib.util.find_spec("_pytest") is not None
 
 
 PyTestFixtureRequestT = _FixtureRequestT
@@ -26,48 +51,108 @@ OptPyTestFixtureRequestT = Optional[_FixtureRequestT]
 OptCopyIgnoreFnT = Optional[Callable[[str, List[str]], Set[str]]]
 
 
-@dataclass
+# `slots` is only supported starting with python 3.10.
+_SLOTS_DATACLASS_KWARGS: Dict[str, Any] = \
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS_DATACLASS_KWARGS)
 class CacheDirState:
     path: Optional[Path]
     valid: bool
+    # Last modification time of the cache dir when already known. Allows
+    # to spare another stat of the cache dir.
+    mtime: Optional[float] = None
+
+
+# Shared by all "no possible cache" cases.
+_NO_CACHE_DIR_STATE = CacheDirState(path=None, valid=False)
+
+
+# A cache dir provider is any callable taking the module filename and
+# cache id and returning the corresponding cache dir state.
+CacheDirProviderT = Callable[[Path, str], CacheDirState]
+OptCacheDirProviderT = Optional[CacheDirProviderT]
 
 
 class ICacheDirProvider(ABC):
+    # Kept as a base for backward compatibility with third-party providers.
+    # Providers in this module are plain callables instead.
     @abstractmethod
     def mk_cache_dir(
             self, module_filename: Path, cache_id: str
     ) -> CacheDirState:
         pass
 
+    # Instances are thus valid `CacheDirProviderT`.
+    def __call__(
+            self, module_filename: Path, cache_id: str
+    ) -> CacheDirState:
+        return self.mk_cache_dir(module_filename, cache_id)
 
-OptICacheDirProvider = Optional[ICacheDirProvider]
 
+OptICacheDirProvider = OptCacheDirProviderT
 
-def _mk_unique_cache_str_for(module_filename: Path, cache_id: str) -> str:
+
+@lru_cache(maxsize=4096)
+def _mk_unique_cache_str_for_cached(module_filename_str: str, cache_id: str) -> str:
     # Some program such as gpg do not work well with long files names.
     # Using a short hash of what would have been the dir name fixes
     # those cases.
-    composed_str = f"nsft-{module_filename}-{cache_id}"
-    hashed_str = \
-        hashlib.sha256(composed_str.encode()).hexdigest()[0:12]
-    return hashed_str
+    # This is not for security purposes, only for uniqueness. Using a 6 bytes
+    # `blake2b` digest directly gives us the 12 hex chars we need.
+    composed_str = f"nsft-{module_filename_str}-{cache_id}"
+    return hashlib.blake2b(composed_str.encode(), digest_size=6).hexdigest()
+
+
+def _mk_unique_cache_str_for(module_filename: Path, cache_id: str) -> str:
+    return _mk_unique_cache_str_for_cached(str(module_filename), cache_id)
+
+
+def _get_dir_mtime_if_exists(dir: Path) -> Optional[float]:
+    # A single stat tells both whether the dir exists and its mtime, which
+    # spares `obtain_cache_dir` another stat.
+    try:
+        return os.stat(dir).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _is_writable_dir(dir: Path) -> bool:
+    return os.access(dir, os.W_OK)
+
+
+def default_mk_cache_dir(module_filename: Path, cache_id: str) -> CacheDirState:
+    module_dir = Path(module_filename).parent
+    unique_hashed_str = _mk_unique_cache_str_for(module_filename, cache_id)
+    cache_dir = module_dir.joinpath(
+        "__pycache__", "nsft", unique_hashed_str)
+    cache_mtime = _get_dir_mtime_if_exists(cache_dir)
+    if cache_mtime is None:
+        if not _is_writable_dir(module_dir):
+            # Most likely a read-only file system. No possible cache.
+            return _NO_CACHE_DIR_STATE
+
+        return CacheDirState(path=cache_dir, valid=False)
+
+    return CacheDirState(path=cache_dir, valid=True, mtime=cache_mtime)
+
+
+def disabled_mk_cache_dir(module_filename: Path, cache_id: str) -> CacheDirState:
+    return _NO_CACHE_DIR_STATE
 
 
 class DefaultCacheDirProvider(ICacheDirProvider):
     def mk_cache_dir(
             self, module_filename: Path, cache_id: str) -> CacheDirState:
-        module_dir = Path(module_filename).parent
-        unique_hashed_str = _mk_unique_cache_str_for(module_filename, cache_id)
-        cache_dir = module_dir.joinpath(
-            "__pycache__", "nsft", unique_hashed_str)
-        cache_dir_exists = cache_dir.exists()
-        return CacheDirState(path=cache_dir, valid=cache_dir_exists)
+        return default_mk_cache_dir(module_filename, cache_id)
 
 
 class DisabledCacheDirProvider(ICacheDirProvider):
     def mk_cache_dir(
             self, module_filename: Path, cache_id: str) -> CacheDirState:
-        return CacheDirState(path=None, valid=False)
+        return disabled_mk_cache_dir(module_filename, cache_id)
 
 
 def _is_dir_caching_disabled() -> bool:
@@ -78,56 +163,169 @@ def _is_dir_caching_disabled() -> bool:
     return False
 
 
+def _mark_cache_dir_accessed(cache_dir: Path, cache_dir_exists: bool) -> bool:
+    try:
+        if not cache_dir_exists:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        # Mark the cache as last accessed now.
+        os.utime(cache_dir)
+    except OSError as e:
+        if errno.EROFS != e.errno:
+            raise  # re-raise.
+
+        # Read-only file system.
+        return False
+
+    return True
+
+
+def _is_empty_dir(dir: Path) -> bool:
+    with os.scandir(dir) as it:
+        return next(it, None) is None
+
+
+_stale_dirs_queue: "queue.Queue[Path]" = queue.Queue()
+_stale_dirs_remover: Optional[threading.Thread] = None
+_stale_dirs_remover_lock = threading.Lock()
+
+
+def _remove_stale_dirs_forever() -> None:
+    while True:
+        stale_dir = _stale_dirs_queue.get()
+        try:
+            shutil.rmtree(stale_dir, ignore_errors=True)
+        finally:
+            _stale_dirs_queue.task_done()
+
+
+def _wait_for_stale_dirs_removal(timeout_s: float = 5.0) -> None:
+    # Give pending removals a chance to complete without blocking the exit
+    # for too long. Any leftover is collected on the next invalidation.
+    with _stale_dirs_queue.all_tasks_done:
+        _stale_dirs_queue.all_tasks_done.wait_for(
+            lambda: 0 == _stale_dirs_queue.unfinished_tasks, timeout_s)
+
+
+def _ensure_stale_dirs_remover_started() -> None:
+    global _stale_dirs_remover
+    with _stale_dirs_remover_lock:
+        if _stale_dirs_remover is not None:
+            return
+
+        _stale_dirs_remover = threading.Thread(
+            target=_remove_stale_dirs_forever,
+            name="nsft-stale-dirs-remover",
+            daemon=True)
+        _stale_dirs_remover.start()
+        atexit.register(_wait_for_stale_dirs_removal)
+
+
+def _remove_dir_in_background(dir: Path) -> None:
+    # Renaming is a cheap metadata only operation which frees `dir` right
+    # away. The potentially large recursive removal is left to a background
+    # thread.
+    stale_prefix = f"{dir.name}.stale."
+    stale_dir = dir.with_name(f"{stale_prefix}{os.getpid()}.{time.time_ns()}")
+    os.rename(dir, stale_dir)
+
+    _ensure_stale_dirs_remover_started()
+    # Also collect what previous processes might not have had time to remove.
+    for d in dir.parent.glob(f"{stale_prefix}*"):
+        _stale_dirs_queue.put(d)
+
+
+# Prefix of the dirs cache content is generated into before being moved in
+# place. Kept short as some program such as gpg do not work well with long
+# files names.
+_STAGING_DIR_PREFIX = ".s-"
+
+
+def _remove_leftover_staging_dirs_in_background(
+        dir: Path, stale_after_s: float) -> None:
+    # Generations interrupted without a chance to clean up (e.g.: killed
+    # process) leave their staging dir behind. Only collect those old enough
+    # not to belong to a live generation.
+    stale_before_s = time.time() - stale_after_s
+    for d in dir.glob(f"{_STAGING_DIR_PREFIX}*"):
+        try:
+            is_stale = os.stat(d).st_mtime < stale_before_s
+        except FileNotFoundError:
+            continue
+
+        if is_stale:
+            _ensure_stale_dirs_remover_started()
+            _stale_dirs_queue.put(d)
+
+
+# Cheaper to read when available (linux only) and precise enough to
+# measure staleness.
+_COARSE_REALTIME_CLOCK: Optional[int] = getattr(
+    time, "CLOCK_REALTIME_COARSE", None)
+
+
+def _get_coarse_time_s() -> float:
+    if _COARSE_REALTIME_CLOCK is None:
+        return time.time()
+
+    return time.clock_gettime(_COARSE_REALTIME_CLOCK)
+
+
 def obtain_cache_dir(
         module_filename: Path,
         cache_id: str,
         stale_after_s: Optional[float] = None,
-        cache_dir_provider: OptICacheDirProvider = None
+        cache_dir_provider: OptCacheDirProviderT = None
 ) -> CacheDirState:
     if stale_after_s is None:
         # Defaults to 30 minutes.
         stale_after_s = 60 * 30
 
     if _is_dir_caching_disabled():
-        cache_dir_provider = DisabledCacheDirProvider()
-    elif cache_dir_provider is None:
-        cache_dir_provider = DefaultCacheDirProvider()
+        return _NO_CACHE_DIR_STATE
+
+    if cache_dir_provider is None:
+        cache_dir_provider = default_mk_cache_dir
 
-    prov_dir_state = cache_dir_provider.mk_cache_dir(module_filename, cache_id)
+    prov_dir_state = cache_dir_provider(module_filename, cache_id)
 
     if prov_dir_state.path is None:
         assert not prov_dir_state.valid
         # No possible cache for unknown reason. Caching might be disabled or
         # file system used by the cache provider read-only.
-        return CacheDirState(path=None, valid=False)
+        return _NO_CACHE_DIR_STATE
 
     cache_dir = prov_dir_state.path
     cache_dir_exists = prov_dir_state.valid
-    cache_last_accessed_token = cache_dir.joinpath(".nsft-cache-last-accessed-token")
 
-    try:
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        touch_file(cache_last_accessed_token)
-    except OSError as e:
-        if 30 != e.errno:
-            raise  # re-raise.
+    # Staleness is measured from the last access, i.e.: the cache dir's mtime
+    # before we bump it below.
+    cache_mtime_s = prov_dir_state.mtime
+    if cache_dir_exists and cache_mtime_s is None:
+        cache_mtime_s = os.stat(cache_dir).st_mtime
 
+    if not _mark_cache_dir_accessed(cache_dir, cache_dir_exists):
         # Read-only file system. No possible cache.
-        return CacheDirState(path=None, valid=False)
+        return _NO_CACHE_DIR_STATE
 
     if not cache_dir_exists:
-        cache_last_accessed_token.unlink()
         return CacheDirState(path=cache_dir, valid=False)
 
-    cache_mtime_s = os.stat(cache_dir).st_mtime
+    assert cache_mtime_s is not None
     cache_stale_s = cache_mtime_s + stale_after_s
-    current_time_s = time.time()
-    assert cache_mtime_s <= current_time_s
+    # Note that the file system clock might be slightly ahead of ours (clock
+    # adjustments, coarse vs fine grained clocks). This is of no consequence
+    # given stale delays are expressed in minutes.
+    current_time_s = _get_coarse_time_s()
     if current_time_s < cache_stale_s:
         return CacheDirState(path=cache_dir, valid=True)
 
     # Stale cache. Recreate.
-    shutil.rmtree(cache_dir)
+    _remove_leftover_staging_dirs_in_background(cache_dir.parent, stale_after_s)
+    if _is_empty_dir(cache_dir):
+        # Nothing worth a recursive removal.
+        return CacheDirState(path=cache_dir, valid=False)
+
+    _remove_dir_in_background(cache_dir)
     cache_dir.mkdir()
     return CacheDirState(path=cache_dir, valid=False)
 
@@ -137,6 +335,244 @@ def copy_ignore_gpg_home_dir(src, names):
     return names
 
 
+# The `FICLONE` ioctl request (i.e.: `_IOW(0x94, 9, int)`). Only exposed
+# by `fcntl` starting with python 3.12.
+_FICLONE = 0x40049409
+
+
+def _try_reflink_fd(src_fd: int, dst_fd: int) -> bool:
+    # On copy-on-write file systems (btrfs, xfs, zfs, ...), cloning a file
+    # only shares its blocks instead of copying its bytes.
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError:
+        # Not supported by this file system.
+        return False
+
+    return True
+
+
+def _sendfile_copy(src: str, dst: str) -> str:
+    # Linux only. Compared to `shutil.copy2`, both files are opened only
+    # once and the source's `fstat` is the only stat performed. The copy
+    # itself is either a reflink or an in kernel `sendfile`. Only the file
+    # mode is replicated.
+    src_fd = os.open(src, os.O_RDONLY | os.O_CLOEXEC | os.O_NONBLOCK)
+    try:
+        src_st = os.fstat(src_fd)
+        if not stat.S_ISREG(src_st.st_mode):
+            # Let `shutil` report on special files.
+            return shutil.copy2(src, dst)
+
+        dst_fd = os.open(
+            dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o600)
+        try:
+            if not _try_reflink_fd(src_fd, dst_fd):
+                while 0 < os.sendfile(dst_fd, src_fd, None, 1 << 30):
+                    pass
+
+            os.fchmod(dst_fd, stat.S_IMODE(src_st.st_mode))
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    return dst
+
+
+@lru_cache(maxsize=1)
+def _get_clonefile_fn() -> Optional[Callable[..., int]]:
+    # Resolved only once as looking up and loading the library is costly.
+    lib_system_path = find_library("System")
+    if lib_system_path is None:
+        return None
+
+    lib_system = ctypes.CDLL(lib_system_path, use_errno=True)
+    return lib_system.clonefile
+
+
+def _clonefile_tree(src: Path, dst: Path) -> bool:
+    # On macOS, `clonefile` clones a whole directory tree in a single call.
+    clonefile = _get_clonefile_fn()
+    if clonefile is None:
+        return False
+
+    return 0 == clonefile(os.fsencode(src), os.fsencode(dst), 0)
+
+
+_CopyFnT = Callable[[str, str], Any]
+_SrcDstPairsT = List[Tuple[str, str]]
+
+
+def _mk_tree_dirs(
+        src: Path, dst: Path, ignore: OptCopyIgnoreFnT = None
+) -> Tuple[_SrcDstPairsT, _SrcDstPairsT]:
+    # Walk `src` once, creating the directory structure under `dst` on the
+    # way. Returns the `(src, dst)` pairs of the directories (parents first)
+    # and of the files still to be copied.
+    dir_pairs: _SrcDstPairsT = []
+    file_pairs: _SrcDstPairsT = []
+
+    pending_dirs = [(os.fspath(src), os.fspath(dst))]
+    while pending_dirs:
+        src_dir, dst_dir = pending_dirs.pop()
+        with os.scandir(src_dir) as it:
+            entries = list(it)
+
+        ignored_names: Set[str] = set()
+        if ignore is not None:
+            ignored_names = ignore(src_dir, [e.name for e in entries])
+
+        os.mkdir(dst_dir)
+        dir_pairs.append((src_dir, dst_dir))
+
+        for entry in entries:
+            if entry.name in ignored_names:
+                continue
+
+            entry_dst = os.path.join(dst_dir, entry.name)
+            if entry.is_dir():
+                pending_dirs.append((entry.path, entry_dst))
+            else:
+                file_pairs.append((entry.path, entry_dst))
+
+    return dir_pairs, file_pairs
+
+
+def _copy_tree_dirs_stat(dir_pairs: _SrcDstPairsT) -> None:
+    # Children first so that their content is complete.
+    for src_dir, dst_dir in reversed(dir_pairs):
+        shutil.copystat(src_dir, dst_dir)
+
+
+def _mk_default_copy_workers() -> int:
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _parallel_copytree(
+        src: Path,
+        dst: Path,
+        ignore: OptCopyIgnoreFnT = None,
+        workers: Optional[int] = None,
+        copy_function: _CopyFnT = shutil.copy2
+) -> None:
+    # Copying many small files is mostly syscall latency bound. Copying
+    # these from a thread pool (the gil being released during io) allows
+    # those to overlap.
+    if workers is None:
+        workers = _mk_default_copy_workers()
+
+    dir_pairs, file_pairs = _mk_tree_dirs(src, dst, ignore)
+
+    if workers <= 1 or len(file_pairs) <= 1:
+        for src_file, dst_file in file_pairs:
+            copy_function(src_file, dst_file)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(copy_function, src_file, dst_file)
+                for src_file, dst_file in file_pairs
+            ]
+            for f in futures:
+                f.result()  # Re-raises on copy error.
+
+    _copy_tree_dirs_stat(dir_pairs)
+
+
+def _fast_copytree(
+        src: Path,
+        dst: Path,
+        ignore: OptCopyIgnoreFnT = None,
+        workers: Optional[int] = None
+) -> None:
+    # Whole tree clone cannot skip ignored files.
+    if "darwin" == sys.platform and ignore is None and _clonefile_tree(src, dst):
+        return
+
+    copy_function: _CopyFnT = shutil.copy2
+    if sys.platform.startswith("linux"):
+        copy_function = _sendfile_copy
+
+    _parallel_copytree(
+        src, dst, ignore=ignore, workers=workers, copy_function=copy_function)
+
+
+def _hardlink_file(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise  # re-raise.
+
+        shutil.copy2(src, dst)
+
+
+def _hardlink_tree(
+        src: Path, dst: Path, ignore: OptCopyIgnoreFnT = None) -> None:
+    # Hardlinked files share their inode (thus content and permissions) with
+    # the source. Files are copied instead when this is not possible (e.g.:
+    # across devices, when not permitted or past the link count limit).
+    dir_pairs, file_pairs = _mk_tree_dirs(src, dst, ignore)
+
+    for src_file, dst_file in file_pairs:
+        _hardlink_file(src_file, dst_file)
+
+    _copy_tree_dirs_stat(dir_pairs)
+
+
+def _replace_dir_w_cache_content(
+        cache_dir: Path,
+        dir: Path,
+        copy_ignore_fn: OptCopyIgnoreFnT,
+        symlink_mode: bool,
+        hardlink: bool,
+        workers: Optional[int]
+) -> None:
+    if dir.is_symlink():
+        dir.unlink()
+    else:
+        shutil.rmtree(dir)
+
+    if symlink_mode:
+        dir.symlink_to(cache_dir, target_is_directory=True)
+        return
+
+    if hardlink:
+        _hardlink_tree(cache_dir, dir, ignore=copy_ignore_fn)
+        return
+
+    _fast_copytree(cache_dir, dir, ignore=copy_ignore_fn, workers=workers)
+
+
+def _generate_cache_content(
+        cache_dir: Path,
+        generate_dir_content_fn: Callable[[Path], Any],
+        cache_info_line: str
+) -> None:
+    # Generate into a staging sibling of the cache dir (thus on the same file
+    # system) and only then rename it in place. This way, a failing generation
+    # never leaves a partially populated (or empty) cache dir behind that
+    # would later be considered valid.
+    staging_dir = Path(tempfile.mkdtemp(
+        prefix=_STAGING_DIR_PREFIX, dir=cache_dir.parent))
+    try:
+        # `mkdtemp` creates a private (0o700) dir. Give it the mode the cache
+        # dir got from the umask so that it ends up on restored dirs as well.
+        shutil.copymode(cache_dir, staging_dir)
+        generate_dir_content_fn(staging_dir)
+
+        # Write some info about what module / function gave rise to this cache.
+        cache_info = staging_dir.joinpath(".nsft-cache-info")
+        write_text_file_content(cache_info, [cache_info_line])
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        raise
+
+    shutil.rmtree(cache_dir)
+    os.replace(staging_dir, cache_dir)
+
+
 _LoadDirContentRetT = TypeVar('_LoadDirContentRetT')
 
 
@@ -145,10 +581,26 @@ def create_dir_content_cached(
         dir: Path,
         generate_dir_content_fn: Callable[[Path], _LoadDirContentRetT],
         stale_after_s: Optional[float] = None,
-        cache_dir_provider: OptICacheDirProvider = None,
+        cache_dir_provider: OptCacheDirProviderT = None,
         copy_ignore_fn: OptCopyIgnoreFnT = None,
         load_dir_content_fn: Optional[Callable[[Path], _LoadDirContentRetT]] = None,
+        symlink_mode: bool = False,
+        hardlink: bool = False,
+        workers: Optional[int] = None,
+        return_cache_dir: bool = False,
 ) -> _LoadDirContentRetT:
+    # When `return_cache_dir` is set and a cache is available, `dir` is left
+    # untouched and the content is loaded directly from the cache dir
+    # (i.e.: `load_dir_content_fn` receives the cache dir). Callers opting in
+    # must treat the cache dir as read-only.
+    # When `symlink_mode` is set, `dir` is replaced by a symlink to the cache
+    # dir instead of a copy of its content. Only meant for callers that do
+    # not modify `dir`'s content. Note that `copy_ignore_fn` is not honored
+    # in this mode.
+    # When `hardlink` is set, `dir`'s files are hardlinks to the cache dir's
+    # files. Again, only meant for callers that do not modify these files
+    # (including their permissions) as this would also modify the cache.
+    # Otherwise, files are copied from a pool of `workers` threads.
     def default_load_dir_content(in_path: Path) -> _LoadDirContentRetT:
         pass
 
@@ -164,35 +616,40 @@ def create_dir_content_cached(
         cache_dir_provider=cache_dir_provider
     )
 
-    if cache_state.valid:
-        assert cache_state.path is not None
-        shutil.rmtree(dir)
-        shutil.copytree(cache_state.path, dir, ignore=copy_ignore_fn)
-        return load_dir_content_fn(dir)
-
     if cache_state.path is None:
         return generate_dir_content_fn(dir)
 
-    generate_dir_content_fn(cache_state.path)
+    if not cache_state.valid:
+        _generate_cache_content(
+            cache_state.path,
+            generate_dir_content_fn,
+            f"{module_filename}::{cache_id}")
 
-    # Write some info about what module / function gave rise to this cache.
-    cache_info = cache_state.path.joinpath(".nsft-cache-info")
-    write_text_file_content(
-        cache_info, [
-            f"{module_filename}::{cache_id}"]
-    )
+    if return_cache_dir:
+        return load_dir_content_fn(cache_state.path)
 
-    shutil.rmtree(dir)
-    shutil.copytree(cache_state.path, dir, ignore=copy_ignore_fn)
+    _replace_dir_w_cache_content(
+        cache_state.path, dir, copy_ignore_fn, symlink_mode, hardlink,
+        workers)
     return load_dir_content_fn(dir)
 
 
 # There is not much I can do to fix complexity here as indent
 # is artificial.
 if _with_pytest:  # noqa C901
-    class PyTestCacheDirProvider(ICacheDirProvider):
+    _PyTestLocalCacheT = Dict[Tuple[str, str], Path]
+
+    # A new provider is instantiated for each fixture request. The local
+    # cache is thus shared per pytest session (i.e.: per config).
+    _pytest_local_caches: "WeakKeyDictionary[Any, _PyTestLocalCacheT]" = \
+        WeakKeyDictionary()
+
+    class PyTestCacheDirProvider:
         def __init__(self, request: _FixtureRequestT) -> None:
             self._request = request
+            # Spares us pytest cache's json io once a cache dir is known.
+            self._local_cache = _pytest_local_caches.setdefault(
+                request.config, {})
 
         def _mk_pytest_cache_dir(
                 self, cache_key: str, hashed_dir_name: str) -> Optional[Path]:
@@ -204,7 +661,7 @@ if _with_pytest:  # noqa C901
                 cache_dir_str = str(self._request.config.cache.makedir(
                     hashed_dir_name))
             except OSError as e:
-                if 30 != e.errno:
+                if errno.EROFS != e.errno:
                     raise  # re-raise
 
                 # Read-only file-system.
@@ -216,8 +673,16 @@ if _with_pytest:  # noqa C901
             self._request.config.cache.set(cache_key, str(cache_dir))
             return cache_dir
 
-        def mk_cache_dir(
+        def __call__(
                 self, module_filename: Path, cache_id: str) -> CacheDirState:
+            local_key = (str(module_filename), cache_id)
+            cache_dir = self._local_cache.get(local_key, None)
+            if cache_dir is not None:
+                cache_mtime = _get_dir_mtime_if_exists(cache_dir)
+                if cache_mtime is not None:
+                    return CacheDirState(
+                        path=cache_dir, valid=True, mtime=cache_mtime)
+
             module_name = module_filename.stem
 
             unique_hashed_str = \
@@ -229,13 +694,21 @@ if _with_pytest:  # noqa C901
             cache_dir = None
             if existing_cache_dir_str is not None:
                 cache_dir = Path(existing_cache_dir_str)
-                if cache_dir.exists():
-                    return CacheDirState(path=cache_dir, valid=True)
+                cache_mtime = _get_dir_mtime_if_exists(cache_dir)
+                if cache_mtime is not None:
+                    self._local_cache[local_key] = cache_dir
+                    return CacheDirState(
+                        path=cache_dir, valid=True, mtime=cache_mtime)
 
             hashed_dir_name = f"nsft-{unique_hashed_str}"
             cache_dir = self._mk_pytest_cache_dir(cache_key, hashed_dir_name)
+            if cache_dir is not None:
+                self._local_cache[local_key] = cache_dir
             return CacheDirState(path=cache_dir, valid=False)
 
+        # Kept for backward compatibility.
+        mk_cache_dir = __call__
+
     def create_dir_content_cached_from_pytest(
             module_filename: Path,
             dir: Path,
@@ -244,6 +717,10 @@ if _with_pytest:  # noqa C901
             stale_after_s: Optional[float] = None,
             copy_ignore_fn: OptCopyIgnoreFnT = None,
             load_dir_content_fn: Optional[Callable[[Path], _LoadDirContentRetT]] = None,
+            symlink_mode: bool = False,
+            hardlink: bool = False,
+            workers: Optional[int] = None,
+            return_cache_dir: bool = False,
     ) -> _LoadDirContentRetT:
         if request is None:
             cache_dir_provider = None
@@ -257,4 +734,8 @@ if _with_pytest:  # noqa C901
             stale_after_s,
             cache_dir_provider,
             copy_ignore_fn,
-            load_dir_content_fn)
+            load_dir_content_fn,
+            symlink_mode,
+            hardlink,
+            workers,
+            return_cache_dir)
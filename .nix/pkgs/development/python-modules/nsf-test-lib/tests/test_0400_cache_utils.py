@@ -0,0 +1,295 @@
+import os
+import shutil
+import stat
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, cast
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from _pytest.tmpdir import TempPathFactory
+
+from nsft_cache_utils.dir import (
+    CacheDirProviderT,
+    DisabledCacheDirProvider,
+    PyTestFixtureRequestT,
+    _wait_for_stale_dirs_removal,
+    create_dir_content_cached,
+    create_dir_content_cached_from_pytest,
+    disabled_mk_cache_dir
+)
+from nsft_system_utils.file import (
+    read_text_file_content,
+    write_text_file_content
+)
+
+
+@pytest.fixture(scope="function")
+def temp_dir(
+        tmp_path_factory: TempPathFactory,
+        monkeypatch: MonkeyPatch) -> Path:
+    # These tests exercise the cache itself. They should not be affected by
+    # the user disabling it.
+    monkeypatch.delenv("NSF_TEST_LIB_NO_DIR_CACHE", raising=False)
+    return tmp_path_factory.mktemp("test-tmp")
+
+
+def _generate_dummy_dir_content(dir: Path) -> None:
+    write_text_file_content(dir.joinpath("a.txt"), ["Line A"])
+    dir.joinpath("subdir").mkdir()
+    write_text_file_content(dir.joinpath("subdir", "b.txt"), ["Line B"])
+    write_text_file_content(dir.joinpath("subdir", "ignored.txt"), ["Ignored"])
+
+
+def _check_dummy_dir_content(dir: Path) -> None:
+    assert ["Line A"] == read_text_file_content(dir.joinpath("a.txt"))
+    assert ["Line B"] == read_text_file_content(dir.joinpath("subdir", "b.txt"))
+    assert not dir.joinpath("subdir", "ignored.txt").exists()
+
+
+def _mk_out_dir(temp_dir: Path, name: str) -> Path:
+    out_dir = temp_dir.joinpath(name)
+    out_dir.mkdir()
+    return out_dir
+
+
+@pytest.mark.parametrize("workers", [None, 1])
+def test_create_dir_content_cached(
+        temp_dir: Path, workers: Optional[int]) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+    generated_dirs: List[Path] = []
+
+    def generate_dummy_dir(dir: Path) -> None:
+        generated_dirs.append(dir)
+        _generate_dummy_dir_content(dir)
+
+    ignore_fn = shutil.ignore_patterns("ignored.txt")
+
+    for name in ["out-miss", "out-hit"]:
+        out_dir = _mk_out_dir(temp_dir, name)
+        create_dir_content_cached(
+            module_filename, out_dir, generate_dummy_dir,
+            copy_ignore_fn=ignore_fn, workers=workers)
+        _check_dummy_dir_content(out_dir)
+
+    # Second call should have been served from the cache.
+    assert 1 == len(generated_dirs)
+    assert generated_dirs[0] != temp_dir.joinpath("out-miss")
+
+
+@pytest.mark.parametrize("cache_dir_provider", [
+    disabled_mk_cache_dir,
+    DisabledCacheDirProvider()
+])
+def test_create_dir_content_cached_disabled(
+        temp_dir: Path, cache_dir_provider: CacheDirProviderT) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+    generated_dirs: List[Path] = []
+
+    def generate_dummy_dir(dir: Path) -> None:
+        generated_dirs.append(dir)
+        _generate_dummy_dir_content(dir)
+
+    for name in ["out-1", "out-2"]:
+        out_dir = _mk_out_dir(temp_dir, name)
+        create_dir_content_cached(
+            module_filename, out_dir, generate_dummy_dir,
+            cache_dir_provider=cache_dir_provider)
+
+    # Generated directly into the output dirs each time.
+    assert [temp_dir.joinpath("out-1"), temp_dir.joinpath("out-2")] \
+        == generated_dirs
+
+
+def test_create_dir_content_cached_dir_mode(temp_dir: Path) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+
+    out_dir = _mk_out_dir(temp_dir, "out-uncached")
+    create_dir_content_cached(
+        module_filename, out_dir, _generate_dummy_dir_content,
+        cache_dir_provider=disabled_mk_cache_dir)
+    expected_mode = stat.S_IMODE(os.stat(out_dir).st_mode)
+
+    for name in ["out-miss", "out-hit"]:
+        out_dir = _mk_out_dir(temp_dir, name)
+        create_dir_content_cached(
+            module_filename, out_dir, _generate_dummy_dir_content)
+        assert expected_mode == stat.S_IMODE(os.stat(out_dir).st_mode)
+
+
+def test_create_dir_content_cached_symlink_mode(temp_dir: Path) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+
+    for name in ["out-miss", "out-hit"]:
+        out_dir = _mk_out_dir(temp_dir, name)
+        create_dir_content_cached(
+            module_filename, out_dir, _generate_dummy_dir_content,
+            symlink_mode=True)
+        assert out_dir.is_symlink()
+        assert ["Line A"] == read_text_file_content(out_dir.joinpath("a.txt"))
+
+    assert (
+        temp_dir.joinpath("out-miss").resolve()
+        == temp_dir.joinpath("out-hit").resolve())
+
+
+def test_create_dir_content_cached_return_cache_dir(temp_dir: Path) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+
+    def load_dummy_dir(dir: Path) -> Path:
+        return dir
+
+    def generate_dummy_dir(dir: Path) -> Path:
+        _generate_dummy_dir_content(dir)
+        return dir
+
+    loaded_dirs = []
+    for name in ["out-miss", "out-hit"]:
+        out_dir = _mk_out_dir(temp_dir, name)
+        loaded_dir = create_dir_content_cached(
+            module_filename, out_dir, generate_dummy_dir,
+            load_dir_content_fn=load_dummy_dir, return_cache_dir=True)
+        assert not list(out_dir.iterdir())
+        loaded_dirs.append(loaded_dir)
+
+    assert loaded_dirs[0] == loaded_dirs[1]
+    assert ["Line A"] == read_text_file_content(loaded_dirs[1].joinpath("a.txt"))
+
+
+def test_create_dir_content_cached_failed_generation(temp_dir: Path) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+
+    def generate_dummy_dir(dir: Path) -> None:
+        write_text_file_content(dir.joinpath("a.txt"), ["Partial"])
+        raise RuntimeError("Generation failed")
+
+    out_dir = _mk_out_dir(temp_dir, "out-failed")
+    with pytest.raises(RuntimeError):
+        create_dir_content_cached(
+            module_filename, out_dir, generate_dummy_dir)
+
+    # Ensure no partial cache content is left behind for a later call.
+    generated_dirs: List[Path] = []
+
+    def generate_dummy_dir_ok(dir: Path) -> None:
+        generated_dirs.append(dir)
+        _generate_dummy_dir_content(dir)
+
+    generate_dummy_dir_ok.__name__ = generate_dummy_dir.__name__
+
+    out_dir = _mk_out_dir(temp_dir, "out-ok")
+    create_dir_content_cached(
+        module_filename, out_dir, generate_dummy_dir_ok)
+    assert 1 == len(generated_dirs)
+    assert ["Line A"] == read_text_file_content(out_dir.joinpath("a.txt"))
+
+
+def test_create_dir_content_cached_hardlink(temp_dir: Path) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+    ignore_fn = shutil.ignore_patterns("ignored.txt")
+
+    for name in ["out-miss", "out-hit"]:
+        out_dir = _mk_out_dir(temp_dir, name)
+        create_dir_content_cached(
+            module_filename, out_dir, _generate_dummy_dir_content,
+            copy_ignore_fn=ignore_fn, hardlink=True)
+        _check_dummy_dir_content(out_dir)
+
+    out_miss_file = temp_dir.joinpath("out-miss", "subdir", "b.txt")
+    out_hit_file = temp_dir.joinpath("out-hit", "subdir", "b.txt")
+    assert os.stat(out_miss_file).st_ino == os.stat(out_hit_file).st_ino
+    # Cache file and the 2 links.
+    assert 3 == os.stat(out_hit_file).st_nlink
+
+
+def test_create_dir_content_cached_stale(temp_dir: Path) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+    generated_dirs: List[Path] = []
+
+    def generate_dummy_dir(dir: Path) -> None:
+        generated_dirs.append(dir)
+        _generate_dummy_dir_content(dir)
+
+    stale_after_s = 60
+    for name in ["out-miss", "out-hit", "out-stale"]:
+        if "out-stale" == name:
+            # Make the cache look as if last accessed long ago.
+            cache_dirs = list(temp_dir.glob("__pycache__/nsft/*"))
+            assert 1 == len(cache_dirs)
+            long_ago_s = time.time() - 2 * stale_after_s
+            os.utime(cache_dirs[0], (long_ago_s, long_ago_s))
+
+            # As well as what an interrupted generation left behind long ago
+            # and what a generation might currently be working on.
+            leftover_staging_dir = cache_dirs[0].with_name(".s-leftover")
+            leftover_staging_dir.mkdir()
+            os.utime(leftover_staging_dir, (long_ago_s, long_ago_s))
+            live_staging_dir = cache_dirs[0].with_name(".s-live")
+            live_staging_dir.mkdir()
+
+        out_dir = _mk_out_dir(temp_dir, name)
+        create_dir_content_cached(
+            module_filename, out_dir, generate_dummy_dir,
+            stale_after_s=stale_after_s)
+        assert ["Line A"] == read_text_file_content(out_dir.joinpath("a.txt"))
+
+    assert 2 == len(generated_dirs)
+
+    # Stale cache content is removed in the background.
+    _wait_for_stale_dirs_removal()
+    assert not list(temp_dir.glob("__pycache__/nsft/*.stale.*"))
+    assert not leftover_staging_dir.exists()
+    assert live_staging_dir.exists()
+
+
+class _StubPyTestCache:
+    # Stands for pytest's `config.cache`, rooted in a temporary dir so that
+    # tests do not leave entries behind in the project's `.pytest_cache`.
+    def __init__(self, cache_dir: Path) -> None:
+        self._cache_dir = cache_dir
+        self._values: Dict[str, Any] = {}
+
+    def makedir(self, name: str) -> Path:
+        dir = self._cache_dir.joinpath("d", name)
+        dir.mkdir(parents=True, exist_ok=True)
+        return dir
+
+    def get(self, key: str, default: Any) -> Any:
+        return self._values.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self._values[key] = value
+
+
+class _StubPyTestConfig:
+    def __init__(self, cache: _StubPyTestCache) -> None:
+        self.cache = cache
+
+
+class _StubPyTestRequest:
+    def __init__(self, config: _StubPyTestConfig) -> None:
+        self.config = config
+
+
+def _mk_stub_pytest_request(temp_dir: Path) -> PyTestFixtureRequestT:
+    cache = _StubPyTestCache(temp_dir.joinpath(".pytest_cache"))
+    return cast(
+        PyTestFixtureRequestT, _StubPyTestRequest(_StubPyTestConfig(cache)))
+
+
+def test_create_dir_content_cached_from_pytest(temp_dir: Path) -> None:
+    module_filename = temp_dir.joinpath("dummy_module.py")
+    request = _mk_stub_pytest_request(temp_dir)
+    generated_dirs: List[Path] = []
+
+    def generate_dummy_dir_from_pytest(dir: Path) -> None:
+        generated_dirs.append(dir)
+        _generate_dummy_dir_content(dir)
+
+    for name in ["out-miss", "out-hit"]:
+        out_dir = _mk_out_dir(temp_dir, name)
+        create_dir_content_cached_from_pytest(
+            module_filename, out_dir, generate_dummy_dir_from_pytest, request)
+        assert ["Line A"] == read_text_file_content(out_dir.joinpath("a.txt"))
+
+    assert 1 == len(generated_dirs)
@@ -1,9 +1,23 @@
 import os
+from pathlib import Path
+
 import pytest
 
+# The environment is not expected to change during a test session.
+_IN_BUILD_ENV = "1" == os.environ.get("PKG_NSF_FACTORY_COMMON_INSTALL_IN_BUILD_ENV")
+_SKIP_REASON = (
+    "Should be run only from build environement. "
+    "See `PKG_NSF_FACTORY_COMMON_INSTALL_IN_BUILD_ENV`.")
+
+_THIS_DIR = Path(__file__).parent
+
+
+def pytest_collection_modifyitems(config, items):
+    if _IN_BUILD_ENV:
+        return
 
-def pytest_runtest_setup(item):
-    if "1" != os.environ.get("PKG_NSF_FACTORY_COMMON_INSTALL_IN_BUILD_ENV"):
-        pytest.skip(
-            "Should be run only from build environement. "
-            "See `PKG_NSF_FACTORY_COMMON_INSTALL_IN_BUILD_ENV`.")
+    # This hook receives the whole session's items, not only ours.
+    skip_marker = pytest.mark.skip(reason=_SKIP_REASON)
+    for item in items:
+        if _THIS_DIR in Path(str(item.fspath)).parents:
+            item.add_marker(skip_marker)